@@ -0,0 +1,118 @@
+"""Simulate quiz rounds on QuizEngine without a display and report latencies.
+
+    python bench.py --teams 200 --students 5000 --questions 100000 --rounds 20000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from engine import QuizEngine
+from profiling import percentile
+from questions import MemoryQuestionBank
+
+
+def build_engine(args):
+    bank = MemoryQuestionBank(
+        (str(i), {"question": f"Question {i}?", "answer": f"Answer {i}"}) for i in range(args.questions)
+    )
+    team_names = [f"Team {i+1}" for i in range(args.teams)]
+    student_team = {str(i): team_names[i % args.teams] for i in range(args.students)}
+    return QuizEngine(bank, team_names, student_team, seed=args.seed)
+
+
+def simulate(engine, args):
+    rng = random.Random(args.seed)
+    timings = {"draw": [], "student": [], "skip": [], "score": [], "set_score": []}
+    clock = time.perf_counter_ns
+
+    def timed(op, fn, *fn_args):
+        start = clock()
+        result = fn(*fn_args)
+        timings[op].append(clock() - start)
+        return result
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        if timed("draw", engine.draw_question) is None:
+            engine.question_deck.refill()
+            continue
+        timed("student", engine.pick_student)
+        # Teams pass until one answers or everyone has skipped
+        while True:
+            if rng.random() < args.skip_rate:
+                if timed("skip", engine.skip):
+                    break
+                timed("student", engine.pick_student)
+            else:
+                timed("score", engine.mark_correct)
+                engine.next_team()
+                break
+        if rng.random() < args.override_rate:
+            team = rng.choice(engine.team_names)
+            timed("set_score", engine.set_score, team, rng.randint(0, args.rounds))
+    elapsed = time.perf_counter() - start
+    return elapsed, timings
+
+
+def report(args, elapsed, timings):
+    ops = sum(len(samples) for samples in timings.values())
+    result = {
+        "rounds": args.rounds,
+        "teams": args.teams,
+        "students": args.students,
+        "questions": args.questions,
+        "elapsed_s": elapsed,
+        "rounds_per_s": args.rounds / elapsed if elapsed else 0,
+        "ops_per_s": ops / elapsed if elapsed else 0,
+        "ops": {},
+    }
+    for op, samples in timings.items():
+        samples.sort()
+        result["ops"][op] = {
+            "count": len(samples),
+            "p50_us": percentile(samples, 50) / 1000,
+            "p99_us": percentile(samples, 99) / 1000,
+            "max_us": (samples[-1] if samples else 0) / 1000,
+        }
+    return result
+
+
+def print_report(result):
+    print(
+        f"{result['rounds']} rounds, {result['teams']} teams, {result['students']} students, "
+        f"{result['questions']} questions in {result['elapsed_s']:.3f}s"
+    )
+    print(f"{result['rounds_per_s']:.0f} rounds/s, {result['ops_per_s']:.0f} ops/s")
+    print(f"{'op':<10}{'count':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}")
+    for op, stats in result["ops"].items():
+        print(f"{op:<10}{stats['count']:>10}{stats['p50_us']:>10.1f}{stats['p99_us']:>10.1f}{stats['max_us']:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, default=100)
+    parser.add_argument("--students", type=int, default=3000)
+    parser.add_argument("--questions", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=10000)
+    parser.add_argument("--skip-rate", type=float, default=0.3, help="chance a team passes on a question")
+    parser.add_argument("--override-rate", type=float, default=0.05, help="chance of a manual score override per round")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    if args.teams < 1:
+        parser.error("--teams must be at least 1")
+
+    engine = build_engine(args)
+    elapsed, timings = simulate(engine, args)
+    result = report(args, elapsed, timings)
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Buzzer service for team devices, plus a standalone server and load generator.
+
+Devices talk newline-delimited JSON over TCP:
+    -> {"type": "join", "team": "Team 1"}    <- {"type": "welcome", ...}
+    -> {"type": "buzz"}                      <- {"type": "buzz_result", ...}
+and receive {"type": "round"}, {"type": "winner"} and {"type": "state"} broadcasts.
+
+    python buzzer.py serve --port 8765 --teams 20
+    python buzzer.py load --port 8765 --clients 500 --teams 20 --rounds 10
+"""
+import argparse
+import asyncio
+import json
+import queue
+import random
+import threading
+import time
+
+# Clients that stop reading are dropped once this much output is queued for them
+MAX_CLIENT_BUFFER = 256 * 1024
+
+
+class BuzzerServer:
+    # Runs an asyncio server on its own thread so Tk's mainloop never waits on
+    # the network. The Tk side calls open_round()/broadcast() (thread-safe) and
+    # polls self.buzzes from after() for (round, team, seconds since the round
+    # opened); buzzes from a round older than the last open_round() are stale.
+    def __init__(self, host="0.0.0.0", port=8765):
+        self.host = host
+        self.port = port
+        self.buzzes = queue.Queue()
+        self.error = None
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._clients = {}  # writer -> team, None until the device joins
+        self._state = {}
+        self._round = 0
+        self._last_round = 0  # Last round id handed out by open_round()
+        self._round_lock = threading.Lock()
+        self._eligible = set()
+        self._armed_at = None
+        self._winner = None
+        self._order = []  # (seconds after opening, team) for every valid buzz
+
+    def start(self):
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name="buzzer-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self.port
+
+    def stop(self):
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    def open_round(self, teams):
+        # Accept buzzes from these teams; the first one wins the round. Returns
+        # the round id, known before the server thread has even opened it.
+        with self._round_lock:
+            self._last_round += 1
+            round_id = self._last_round
+        self._call(self._open_round, round_id, list(teams))
+        return round_id
+
+    def close_round(self):
+        return self.open_round([])
+
+    def broadcast(self, state):
+        self._call(self._publish, dict(state))
+
+    def _call(self, fn, *args):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def _run(self, ready):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+            )
+        except OSError as e:
+            self.error = e
+            ready.set()
+            self._loop.close()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            for writer in list(self._clients):
+                writer.close()
+            self._loop.close()
+
+    async def _handle(self, reader, writer):
+        self._clients[writer] = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                received = time.monotonic()
+                try:
+                    message = json.loads(line)
+                    kind = message["type"]
+                except (ValueError, KeyError, TypeError):
+                    self._send(writer, {"type": "error", "error": "expected a JSON object with a type"})
+                    continue
+                if kind == "join":
+                    self._clients[writer] = message.get("team")
+                    self._send(writer, {"type": "welcome", "team": message.get("team"), "round": self._round})
+                    if self._state:
+                        self._send(writer, dict(self._state, type="state"))
+                elif kind == "buzz":
+                    self._buzz(writer, received)
+                else:
+                    self._send(writer, {"type": "error", "error": f"unknown message type {kind!r}"})
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # ValueError: readline() hit the stream limit, the device sent a huge line
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+    def _buzz(self, writer, received):
+        team = self._clients.get(writer)
+        if self._armed_at is None or team not in self._eligible:
+            self._send(writer, {"type": "buzz_result", "accepted": False, "round": self._round})
+            return
+        # One buzz per team per round, later ones only keep their place in the order
+        self._eligible.discard(team)
+        elapsed = received - self._armed_at
+        self._order.append((elapsed, team))
+        position = len(self._order)
+        self._send(writer, {"type": "buzz_result", "accepted": True, "round": self._round, "position": position})
+        if self._winner is None:
+            self._winner = team
+            self.buzzes.put((self._round, team, elapsed))
+            self._send_all({"type": "winner", "team": team, "round": self._round, "elapsed": elapsed})
+
+    def _open_round(self, round_id, teams):
+        self._round = round_id
+        self._eligible = set(teams)
+        self._armed_at = time.monotonic() if teams else None
+        self._winner = None
+        self._order = []
+        self._send_all({"type": "round", "round": self._round, "open": bool(teams), "teams": teams})
+
+    def _publish(self, state):
+        self._state = state
+        self._send_all(dict(state, type="state"))
+
+    def _send(self, writer, message):
+        if writer.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+            writer.close()  # Too slow to keep up, it can reconnect
+            return
+        writer.write((json.dumps(message) + "\n").encode("utf-8"))
+
+    def _send_all(self, message):
+        data = (json.dumps(message) + "\n").encode("utf-8")
+        for writer in list(self._clients):
+            if writer.is_closing():
+                continue
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                writer.close()
+                continue
+            writer.write(data)
+
+
+def serve(args):
+    # Standalone server that reopens a round every --interval seconds
+    server = BuzzerServer(args.host, args.port)
+    port = server.start()
+    teams = [f"Team {i+1}" for i in range(args.teams)]
+    print(f"Buzzer server listening on {args.host}:{port}")
+    try:
+        while True:
+            server.open_round(teams)
+            time.sleep(args.interval)
+            while not server.buzzes.empty():
+                _, team, elapsed = server.buzzes.get()
+                print(f"{team} buzzed first after {elapsed * 1000:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+async def load_client(args, team, stats, done):
+    start = time.perf_counter()
+    try:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    except OSError:
+        stats["failed"] += 1
+        return
+    stats["connect"].append(time.perf_counter() - start)
+    writer.write((json.dumps({"type": "join", "team": team}) + "\n").encode("utf-8"))
+    sent_at = None
+    try:
+        while not done.is_set():
+            try:
+                line = await asyncio.wait_for(reader.readline(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            if not line:
+                break
+            message = json.loads(line)
+            if message["type"] == "round" and message["open"] and team in message["teams"]:
+                await asyncio.sleep(random.uniform(0, args.jitter))
+                sent_at = time.perf_counter()
+                writer.write(b'{"type": "buzz"}\n')
+            elif message["type"] == "buzz_result" and sent_at is not None:
+                stats["rtt"].append(time.perf_counter() - sent_at)
+                stats["accepted" if message["accepted"] else "rejected"] += 1
+                sent_at = None
+            elif message["type"] == "winner":
+                stats["winners"][message["round"]] = message["team"]
+                if len(stats["winners"]) >= args.rounds:
+                    done.set()
+    finally:
+        writer.close()
+
+
+async def run_load(args):
+    stats = {"connect": [], "rtt": [], "accepted": 0, "rejected": 0, "failed": 0, "winners": {}}
+    done = asyncio.Event()
+    teams = [f"Team {i+1}" for i in range(args.teams)]
+    clients = [load_client(args, teams[i % args.teams], stats, done) for i in range(args.clients)]
+    try:
+        await asyncio.wait_for(asyncio.gather(*clients), timeout=args.timeout)
+    except asyncio.TimeoutError:
+        pass
+    return stats
+
+
+def load(args):
+    from profiling import percentile
+
+    start = time.perf_counter()
+    stats = asyncio.run(run_load(args))
+    elapsed = time.perf_counter() - start
+    connect = sorted(stats["connect"])
+    rtt = sorted(stats["rtt"])
+    print(f"{len(connect)}/{args.clients} clients connected ({stats['failed']} failed), "
+          f"{len(stats['winners'])} rounds in {elapsed:.2f}s")
+    print(f"connect  p50 {percentile(connect, 50) * 1000:.1f} ms  p99 {percentile(connect, 99) * 1000:.1f} ms")
+    print(f"buzz rtt p50 {percentile(rtt, 50) * 1000:.1f} ms  p99 {percentile(rtt, 99) * 1000:.1f} ms")
+    print(f"{stats['accepted']} buzzes accepted, {stats['rejected']} rejected")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = sub.add_parser("serve", help="run a standalone buzzer server")
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--teams", type=int, default=4)
+    serve_parser.add_argument("--interval", type=float, default=2.0, help="seconds between rounds")
+    serve_parser.set_defaults(func=serve)
+
+    load_parser = sub.add_parser("load", help="connect many simulated devices to a server")
+    load_parser.add_argument("--host", default="127.0.0.1")
+    load_parser.add_argument("--port", type=int, default=8765)
+    load_parser.add_argument("--clients", type=int, default=200)
+    load_parser.add_argument("--teams", type=int, default=4)
+    load_parser.add_argument("--rounds", type=int, default=5, help="stop after this many rounds have a winner")
+    load_parser.add_argument("--jitter", type=float, default=0.05, help="max random delay before buzzing, seconds")
+    load_parser.add_argument("--timeout", type=float, default=60.0)
+    load_parser.set_defaults(func=load)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
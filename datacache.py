@@ -0,0 +1,71 @@
+import marshal
+import os
+import sys
+
+# Bump when the layout of cached data changes
+CACHE_VERSION = 1
+
+
+def load_cached(source_path, build, cache_path=None):
+    # Returns build() for source_path, memoised in a marshal file next to it.
+    # The cache is keyed by the file's size and mtime, and by its sha256 once
+    # those change, so merely touching the file doesn't force a rebuild.
+    if cache_path is None:
+        cache_path = os.path.splitext(source_path)[0] + ".cache"
+    st = os.stat(source_path)
+    # marshal's format is only stable within one Python version
+    key = [CACHE_VERSION, sys.version_info[0], sys.version_info[1]]
+    try:
+        with open(cache_path, "rb") as f:
+            cached = marshal.load(f)
+        if cached["key"] != key:
+            cached = None
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        cached = None
+
+    sha256 = None
+    if cached is not None:
+        if cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            return cached["data"]
+        sha256 = file_sha256(source_path)
+        if cached["sha256"] == sha256:
+            _write_cache(cache_path, dict(cached, mtime_ns=st.st_mtime_ns, size=st.st_size))
+            return cached["data"]
+
+    data = build()
+    _write_cache(cache_path, {
+        "key": key,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": sha256 or file_sha256(source_path),
+        "data": data,
+    })
+    return data
+
+
+def _write_cache(cache_path, cached):
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            marshal.dump(cached, f)
+        os.replace(tmp_path, cache_path)
+    except (OSError, ValueError):
+        pass  # Read-only install directory or unmarshallable data, just don't cache
+
+
+def load_json(path):
+    import json
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def file_sha256(path):
+    # hashlib pulls in OpenSSL, so only import it when a file actually changed
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
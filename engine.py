@@ -0,0 +1,231 @@
+import json
+
+from leaderboard import Leaderboard
+from questions import BalancedDeck, FilteredDeck, QuestionDeck, normalize_tag
+from roster import Roster
+
+
+class QuizEngine:
+    # Quiz state and rules without any Tk code. QuizApp drives it from the
+    # button handlers and redraws from what the methods return, and bench.py
+    # drives it directly to measure it. Every state change is reported to
+    # on_event as a small dict so it can be journaled and replayed with apply().
+    def __init__(self, question_bank, team_names, student_team=None, seed=None, deck=None):
+        self.question_bank = question_bank
+        self.seed = seed
+        self.question_deck = deck if deck is not None else QuestionDeck(question_bank.ids(), seed=seed)
+        self.team_names = list(team_names)
+        self._team_index = {team: i for i, team in enumerate(self.team_names)}
+        self.leaderboard = Leaderboard(self.team_names)
+        self.roster = Roster(student_team or {}, seed=seed)
+        self.current_qid = None
+        self.current_question = None  # dict with "question" and "answer"
+        self.current_team_index = 0
+        self.skipped_teams = set()
+        self.question_filter = None  # set_filter() arguments while a filter is active
+        self.filtered_deck = None
+        self._tag_index = None
+        self.on_event = None
+
+    @classmethod
+    def from_snapshot(cls, question_bank, state, seed=None, deck=None):
+        # Rebuilds an engine from snapshot(); questions that are no longer in
+        # the bank are ignored
+        engine = cls(question_bank, state["team_names"], seed=seed, deck=deck)
+        engine.roster = Roster.from_state(state["roster"], state["call_counts"])
+        for team, score in state["scores"].items():
+            engine.leaderboard.set_score(team, score)
+        engine.question_deck.refill()
+        for qid in state["drawn"]:
+            engine.question_deck.remove(qid)
+        engine._set_question(state["current_qid"])
+        engine.current_team_index = state["current_team_index"]
+        engine.skipped_teams = set(state["skipped_teams"])
+        if state.get("filter"):
+            engine.set_filter(**state["filter"])
+        return engine
+
+    def snapshot(self):
+        # Plain JSON-friendly copy of the whole state
+        return {
+            "team_names": list(self.team_names),
+            "student_team": dict(self.roster.student_team),
+            "roster": self.roster.state(),
+            "call_counts": dict(self.roster.call_counts),
+            "scores": dict(self.leaderboard.scores),
+            "drawn": self.question_deck.drawn(),
+            "current_qid": self.current_qid,
+            "current_team_index": self.current_team_index,
+            "skipped_teams": sorted(self.skipped_teams),
+            "filter": self.question_filter,
+        }
+
+    def apply(self, event):
+        # Replays an event reported to on_event without reporting it again
+        on_event, self.on_event = self.on_event, None
+        try:
+            kind = event["type"]
+            if kind == "draw":
+                self.skipped_teams.clear()
+                if event["qid"] is not None:
+                    self.question_deck.remove(event["qid"])
+                self._set_question(event["qid"])
+            elif kind == "student":
+                self.roster.mark_called(event["student"])
+            elif kind == "select":
+                self.select_team(event["team"])
+            elif kind == "next_team":
+                self.next_team()
+            elif kind == "correct":
+                self.select_team(event["team"])
+                self.mark_correct()
+            elif kind == "set_score":
+                self.set_score(event["team"], event["score"])
+            elif kind == "skip":
+                self.select_team(event["team"])
+                self.skip()
+            elif kind == "filter":
+                self.set_filter(**event["filter"])
+            elif kind == "reset":
+                self.reset()
+        finally:
+            self.on_event = on_event
+
+    def _emit(self, kind, **fields):
+        if self.on_event is not None:
+            fields["type"] = kind
+            self.on_event(fields)
+
+    def _set_question(self, qid):
+        try:
+            self.current_question = None if qid is None else self.question_bank[qid]
+        except KeyError:
+            qid, self.current_question = None, None
+        self.current_qid = qid
+
+    def _advance(self):
+        self.current_team_index = (self.current_team_index + 1) % len(self.team_names)
+        return self.current_team_index == 0 and self.current_question is None
+
+    @property
+    def current_team(self):
+        return self.team_names[self.current_team_index]
+
+    def select_team(self, team):
+        index = self._team_index[team]
+        if index != self.current_team_index:
+            self.current_team_index = index
+            self._emit("select", team=team)
+
+    def draw_question(self):
+        # Returns the next question, or None once the deck is empty
+        self.skipped_teams.clear()
+        self._set_question(self._next_qid())
+        self._emit("draw", qid=self.current_qid)
+        return self.current_question
+
+    def _next_qid(self):
+        if self.filtered_deck is not None:
+            try:
+                return self.filtered_deck.draw()
+            except IndexError:
+                return None  # Nothing left that matches the filter
+        return self.question_deck.draw() if self.question_deck else None
+
+    def upcoming(self, n):
+        # Ids of the next n questions draw_question() will return
+        deck = self.filtered_deck if self.filtered_deck is not None else self.question_deck
+        return deck.peek(n)
+
+    @property
+    def tag_index(self):
+        if self._tag_index is None:
+            self._tag_index = self.question_bank.tag_index()
+        return self._tag_index
+
+    def set_filter(self, categories=(), difficulties=(), tags=(), balance=False):
+        # Restricts draws to matching questions, e.g. categories=["science"],
+        # difficulties=["hard"]. Values within a field are alternatives, fields
+        # are combined with AND. balance rotates draws through the categories.
+        # The index is only consulted here, draws stay O(1).
+        index = self.tag_index
+        selected = None
+        for field, values in (("category", categories), ("difficulty", difficulties), ("tag", tags)):
+            if values:
+                ids = set()
+                for value in values:
+                    ids.update(index[field].get(normalize_tag(value), ()))
+                selected = ids if selected is None else selected & ids
+        if selected is None and not balance:
+            self.clear_filter()
+            return
+        self.question_filter = {
+            "categories": list(categories), "difficulties": list(difficulties), "tags": list(tags), "balance": balance,
+        }
+        # A seeded quiz draws the same filtered order every run. The seed is
+        # mixed with the filter so each filter gets its own sequence, and the
+        # ids are sorted so the order doesn't depend on set iteration.
+        seed = None if self.seed is None else f"{self.seed}:{json.dumps(self.question_filter, sort_keys=True)}"
+        if balance:
+            self.filtered_deck = BalancedDeck(self.question_deck, {
+                category: [qid for qid in ids if selected is None or qid in selected]
+                for category, ids in index["category"].items()
+            }, seed=seed)
+        else:
+            self.filtered_deck = FilteredDeck(self.question_deck, sorted(selected), seed=seed)
+        self._emit("filter", filter=self.question_filter)
+
+    def clear_filter(self):
+        if self.question_filter is None:
+            return
+        self.question_filter = None
+        self.filtered_deck = None
+        self._emit("filter", filter={})
+
+    def pick_student(self, team=None):
+        student = self.roster.next_student(self.current_team if team is None else team)
+        if student is not None:
+            self._emit("student", student=student)
+        return student
+
+    def next_team(self):
+        # Returns True when play wrapped around with no question on the board
+        needs_question = self._advance()
+        self._emit("next_team")
+        return needs_question
+
+    def set_score(self, team, score):
+        # Returns the leaderboard rows that changed, see Leaderboard.set_score
+        changed = self.leaderboard.set_score(team, score)
+        self._emit("set_score", team=team, score=score)
+        return changed
+
+    def mark_correct(self):
+        team = self.current_team
+        changed = self.leaderboard.add_points(team)
+        self._emit("correct", team=team)
+        return changed
+
+    def skip(self):
+        # Passes the question to the next team. Returns True when a new question
+        # should be drawn, i.e. every team has passed on this one.
+        team = self.current_team
+        self.skipped_teams.add(team)
+        needs_question = self._advance()
+        if len(self.skipped_teams) == len(self.team_names):
+            self.skipped_teams.clear()
+            self.current_qid = self.current_question = None
+            needs_question = True
+        # Emitted last so a snapshot taken by the listener includes the change
+        self._emit("skip", team=team)
+        return needs_question
+
+    def reset(self):
+        self.leaderboard.reset()
+        self.question_deck.refill()
+        self.question_filter = None
+        self.filtered_deck = None
+        self.current_qid = self.current_question = None
+        self.current_team_index = 0
+        self.skipped_teams.clear()
+        self._emit("reset")
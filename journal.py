@@ -0,0 +1,143 @@
+import json
+import os
+import queue
+import threading
+import time
+
+
+class SessionJournal:
+    # Append-only log of QuizEngine events, one JSON object per line, plus a
+    # snapshot of the full state that the log is compacted into. append() and
+    # snapshot() only queue work; a writer thread batches the writes and fsyncs
+    # them so the Tk thread never waits on the disk. Write failures don't stop
+    # the writer, they are kept in self.error for the UI to show.
+    def __init__(self, directory, snapshot_every=500, batch_window=0.1):
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, "journal.log")
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.snapshot_every = snapshot_every
+        self.batch_window = batch_window
+        self.error = None  # Last write error, the writer keeps going after one
+        # Opened here so a journal that can't be written fails the constructor
+        self._log = open(self.log_path, "a", encoding="utf-8")
+        self._seq = 0
+        self._since_snapshot = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="session-journal", daemon=True)
+        self._thread.start()
+
+    def load(self):
+        # Returns (state, events): the latest snapshot and the events logged
+        # after it, or (None, []) when there is no session to resume. Falls
+        # back to the previous session if a new one was never started.
+        state, events = self._load(self.snapshot_path, self.log_path)
+        if state is None:
+            state, events = self._load(_prev_path(self.snapshot_path), _prev_path(self.log_path))
+        return state, events
+
+    def _load(self, snapshot_path, log_path):
+        state, snapshot_seq = None, 0
+        try:
+            with open(snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            state, snapshot_seq = snapshot["state"], snapshot["seq"]
+        except (OSError, ValueError, KeyError):
+            pass
+        events = []
+        try:
+            with open(log_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        break  # Torn write from a crash, nothing after it is valid
+                    if event["seq"] > snapshot_seq:
+                        events.append(event)
+        except OSError:
+            pass
+        self._seq = max([self._seq, snapshot_seq] + [event["seq"] for event in events])
+        if state is None:
+            return None, []
+        return state, events
+
+    def append(self, event):
+        # Returns True once enough events have piled up that the caller
+        # should pass a fresh snapshot() to compact the log
+        self._seq += 1
+        self._since_snapshot += 1
+        self._queue.put(("event", dict(event, seq=self._seq)))
+        return self._since_snapshot >= self.snapshot_every
+
+    def snapshot(self, state):
+        self._since_snapshot = 0
+        self._queue.put(("snapshot", {"seq": self._seq, "state": state}))
+
+    def start_session(self, state):
+        # Keeps the previous session as *.prev files and starts a new log
+        self._queue.put(("rotate", None))
+        self.snapshot(state)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Collect whatever else arrives in the window into one fsync
+            deadline = time.monotonic() + self.batch_window
+            while batch[-1] is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                if self._log.closed:
+                    # A failed snapshot or rotation left no log open, try again
+                    self._log = open(self.log_path, "a", encoding="utf-8")
+                for item in batch:
+                    if item is None:
+                        break
+                    kind, payload = item
+                    if kind == "event":
+                        self._log.write(json.dumps(payload) + "\n")
+                    elif kind == "snapshot":
+                        self._write_snapshot(payload)
+                    elif kind == "rotate":
+                        self._rotate()
+                self._log.flush()
+                os.fsync(self._log.fileno())
+            except Exception as e:  # Anything else would kill the thread and lose every later write
+                self.error = e
+            if batch[-1] is None:
+                self._log.close()
+                return
+
+    def _write_snapshot(self, snapshot):
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # Everything in the log is now covered by the snapshot. If we crash
+        # before truncating, load() skips those events by their seq.
+        self._log.close()
+        self._log = open(self.log_path, "w", encoding="utf-8")
+
+    def _rotate(self):
+        self._log.close()
+        for path in (self.log_path, self.snapshot_path):
+            if os.path.exists(path):
+                os.replace(path, _prev_path(path))
+        self._log = open(self.log_path, "a", encoding="utf-8")
+
+
+def _prev_path(path):
+    root, ext = os.path.splitext(path)
+    return root + ".prev" + ext
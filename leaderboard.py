@@ -0,0 +1,62 @@
+import bisect
+
+
+class Leaderboard:
+    # Keeps teams ranked by score, highest first. Rows are (-score, order, team)
+    # tuples in a sorted list so a score change only moves that one team.
+    def __init__(self, teams):
+        self._order = {team: i for i, team in enumerate(teams)}
+        self.scores = {team: 0 for team in teams}
+        self._rows = [(0, i, team) for i, team in enumerate(teams)]
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _key(self, team):
+        return (-self.scores[team], self._order[team], team)
+
+    def set_score(self, team, score):
+        # Returns the (first, last) range of rows whose text changed,
+        # or None when the score is unchanged
+        old = self.scores[team]
+        if score == old:
+            return None
+        rows = self._rows
+        i = bisect.bisect_left(rows, self._key(team))
+        del rows[i]
+        self.scores[team] = score
+        key = self._key(team)
+        j = bisect.bisect_left(rows, key)
+        rows.insert(j, key)
+        first, last = min(i, j), max(i, j)
+        # Teams just below that tie with the old or new score may change rank
+        while last + 1 < len(rows) and -rows[last + 1][0] in (old, score):
+            last += 1
+        return first, last
+
+    def add_points(self, team, points=1):
+        return self.set_score(team, self.scores[team] + points)
+
+    def rank_at(self, row):
+        # Competition ranking, tied teams share a rank ("1, 2, 2, 4")
+        return bisect.bisect_left(self._rows, (self._rows[row][0],)) + 1
+
+    def rank(self, team):
+        return bisect.bisect_left(self._rows, (-self.scores[team],)) + 1
+
+    def row(self, row):
+        neg_score, _, team = self._rows[row]
+        return self.rank_at(row), team, -neg_score
+
+    def page_count(self, page_size):
+        return max(1, -(-len(self._rows) // page_size))
+
+    def page(self, page, page_size):
+        # (rank, team, score) for the rows on a page, pages start at 0
+        start = page * page_size
+        return [self.row(i) for i in range(start, min(start + page_size, len(self._rows)))]
+
+    def reset(self):
+        for team in self.scores:
+            self.scores[team] = 0
+        self._rows = sorted((0, i, team) for team, i in self._order.items())
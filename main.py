@@ -1,10 +1,20 @@
+from startup import StartupTimer
+startup_timer = StartupTimer()  # Created before the other imports so they are timed
+
 import tkinter as tk
 from tkinter import ttk
-import random
-import json
+import heapq
 import os
 import sys
 
+from datacache import load_cached, load_json
+from engine import QuizEngine
+from journal import SessionJournal
+from profiling import Profiler
+from questions import QuestionBank, QuestionDeck
+
+startup_timer.mark("imports")
+
 # Determine the directory of the executable
 if getattr(sys, 'frozen', False):
     application_path = os.path.dirname(sys.executable)
@@ -14,12 +24,35 @@ else:
 # Construct the paths to the JSON files
 students_file = os.path.join(application_path, "students.json")
 questions_file = os.path.join(application_path, "questions.json")
+session_dir = os.path.join(application_path, "session")
+
+# Loading from JSON through a binary cache; questions are read through an on-disk index when the app starts
+students = load_cached(students_file, lambda: load_json(students_file))
+
+# Teams shown per leaderboard page
+LEADERBOARD_PAGE_SIZE = 10
+
+# Set QUIZ_SEED to replay the same question order
+quiz_seed = os.environ.get("QUIZ_SEED")
+
+# Set QUIZ_BUZZER_PORT to let team devices buzz in over the network (see buzzer.py)
+buzzer_port = os.environ.get("QUIZ_BUZZER_PORT")
+BUZZER_POLL_MS = 20
+
+# Set QUIZ_PROFILE=1 to time button handlers and event-loop lag; slower ones are shown live
+profiler = Profiler(float(os.environ.get("QUIZ_PROFILE_BUDGET_MS", 50))) if os.environ.get("QUIZ_PROFILE") else None
+LAG_PROBE_MS = 100
 
-# Loading from JSON
-with open(students_file, encoding='utf-8') as f:
-    students = json.load(f)
-with open(questions_file, encoding='utf-8') as f:
-    quiz_questions = json.load(f)
+# Question images and audio are decoded in the background and kept in a bounded cache
+MEDIA_CACHE_BYTES = 64 * 1024 * 1024
+MEDIA_POLL_MS = 50
+MEDIA_PREFETCH = 3  # Upcoming questions whose media is loaded ahead of time
+MEDIA_LOADING = "Loading media..."  # Placeholder while a question's media decodes
+
+# Set QUIZ_STARTUP_REPORT to a file path (or 1) to write startup phase timings as JSON
+startup_report = os.environ.get("QUIZ_STARTUP_REPORT")
+if startup_report == "1":
+    startup_report = os.path.join(application_path, "startup_timing.json")
 
 # ... rest of your code ...
 
@@ -40,11 +73,20 @@ class TeamInputDialog(tk.Toplevel):
         self.confirm_button = ttk.Button(self, text="Confirm", command=self.on_confirm)
         self.confirm_button.pack(pady=10)
 
+        # Offered after a crash or a reset
+        if self.parent.resume_state is not None:
+            self.resume_button = ttk.Button(self, text="Resume Previous Quiz", command=self.on_resume)
+            self.resume_button.pack(pady=10)
+
     def on_confirm(self):
         self.parent.num_teams = self.team_count_var.get()
         self.destroy()
         self.parent.show_student_assignment()
 
+    def on_resume(self):
+        self.destroy()
+        self.parent.create_quiz_app(resume=self.parent.resume_state)
+
 class StudentAssignmentDialog(tk.Toplevel):
     def __init__(self, parent):
         super().__init__(parent)
@@ -52,52 +94,128 @@ class StudentAssignmentDialog(tk.Toplevel):
         self.geometry("1080x720")
         self.parent = parent
 
-        self.team_vars = {}
-        self.student_team = {}
+        self.team_names = [f"Team {i+1}" for i in range(self.parent.num_teams)]
+        # Only keep students that are on a team; unassigned students show "None"
+        self.assignments = {
+            student_id: team for student_id, team in self.parent.student_team.items()
+            if student_id in students and team in self.team_names
+        }
 
-        self.label = ttk.Label(self, text="Assign each student to a team:")
+        self.label = ttk.Label(self, text="Select students and assign them to a team:")
         self.label.pack(pady=10)
 
-        self.student_frame = ttk.Frame(self)
-        self.student_frame.pack(fill="both", expand=True, padx=10, pady=5)
-
-        # Adding a canvas and scrollbar
-        self.canvas = tk.Canvas(self.student_frame)
-        self.scrollbar = ttk.Scrollbar(self.student_frame, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.canvas)
+        # --- BULK ACTIONS ---
+        self.action_frame = ttk.Frame(self)
+        self.action_frame.pack(fill="x", padx=10, pady=5)
 
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(
-                scrollregion=self.canvas.bbox("all")
-            )
+        self.team_choice = tk.StringVar(value=self.team_names[0] if self.team_names else "None")
+        self.team_combo = ttk.Combobox(
+            self.action_frame, textvariable=self.team_choice, values=["None"] + self.team_names, state="readonly", width=12
         )
+        self.team_combo.pack(side="left", padx=5)
 
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.assign_button = ttk.Button(self.action_frame, text="Assign Selected", command=self.assign_selected)
+        self.assign_button.pack(side="left", padx=5)
 
-        self.canvas.pack(side="left", fill="both", expand=True)
-        self.scrollbar.pack(side="right", fill="y")
+        self.balance_button = ttk.Button(self.action_frame, text="Auto-Balance", command=self.auto_balance)
+        self.balance_button.pack(side="left", padx=5)
 
-        for student_id, student_name in students.items():
-            frame = ttk.Frame(self.scrollable_frame)
-            frame.pack(fill="x", pady=5)
+        self.import_button = ttk.Button(self.action_frame, text="Import CSV", command=self.import_csv)
+        self.import_button.pack(side="left", padx=5)
+
+        self.status_label = ttk.Label(self.action_frame, text="")
+        self.status_label.pack(side="left", padx=10)
 
-            label = ttk.Label(frame, text=student_name)
-            label.pack(side="left", padx=5)
+        # --- STUDENT LIST ---
+        # A Treeview only draws the visible rows, so large rosters open and scroll quickly
+        self.student_frame = ttk.Frame(self)
+        self.student_frame.pack(fill="both", expand=True, padx=10, pady=5)
 
-            team_var = tk.StringVar(value="None")
-            self.team_vars[student_id] = team_var
+        self.tree = ttk.Treeview(self.student_frame, columns=("name", "team"), show="headings", selectmode="extended")
+        self.tree.heading("name", text="Student")
+        self.tree.heading("team", text="Team")
+        self.tree.column("team", width=150, stretch=False)
+        self.scrollbar = ttk.Scrollbar(self.student_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
 
-            options = ["None"] + [f"Team {i+1}" for i in range(self.parent.num_teams)]
-            dropdown = ttk.OptionMenu(frame, team_var, *options)
-            dropdown.pack(side="right", padx=5)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        for student_id, student_name in students.items():
+            self.tree.insert("", "end", iid=student_id, values=(student_name, self.assignments.get(student_id, "None")))
+
+        # Double-click assigns a single row to the chosen team
+        self.tree.bind("<Double-1>", lambda e: self.assign_selected())
 
         self.confirm_button = ttk.Button(self, text="Confirm", command=self.on_confirm)
         self.confirm_button.pack(pady=10)
 
+    def set_team(self, student_id, team):
+        if team in self.team_names:
+            self.assignments[student_id] = team
+        else:
+            team = "None"
+            self.assignments.pop(student_id, None)
+        self.tree.set(student_id, "team", team)
+
+    def assign_selected(self):
+        team = self.team_choice.get()
+        selected = self.tree.selection()
+        for student_id in selected:
+            self.set_team(student_id, team)
+        self.status_label.config(text=f"Assigned {len(selected)} student(s) to {team}")
+
+    def auto_balance(self):
+        # Put every unassigned student on the team with the fewest members
+        if not self.team_names:
+            return
+        counts = {team: 0 for team in self.team_names}
+        for team in self.assignments.values():
+            counts[team] += 1
+        heap = [(count, i, team) for i, (team, count) in enumerate(counts.items())]
+        heapq.heapify(heap)
+        unassigned = [student_id for student_id in students if student_id not in self.assignments]
+        for student_id in unassigned:
+            count, i, team = heapq.heappop(heap)
+            self.set_team(student_id, team)
+            heapq.heappush(heap, (count + 1, i, team))
+        self.status_label.config(text=f"Balanced {len(unassigned)} student(s) across {len(self.team_names)} teams")
+
+    def import_csv(self):
+        # Rows are "student,team" where student is an id or a name and team is a
+        # team name or number; a header row or unknown rows are skipped
+        from tkinter import filedialog
+        import csv
+
+        path = filedialog.askopenfilename(
+            parent=self, title="Import Assignments", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        ids_by_name = {name: student_id for student_id, name in students.items()}
+        imported = skipped = 0
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                for row in csv.reader(f):
+                    if len(row) < 2:
+                        skipped += 1
+                        continue
+                    student, team = row[0].strip(), row[1].strip()
+                    student_id = student if student in students else ids_by_name.get(student)
+                    if team.isdigit():
+                        team = f"Team {int(team)}"
+                    if student_id is None or (team not in self.team_names and team.lower() not in ("", "none")):
+                        skipped += 1
+                        continue
+                    self.set_team(student_id, team)
+                    imported += 1
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            self.status_label.config(text=f"Import failed: {e}")
+            return
+        self.status_label.config(text=f"Imported {imported} assignment(s), skipped {skipped} row(s)")
+
     def on_confirm(self):
-        self.parent.student_team = {student_id: var.get() for student_id, var in self.team_vars.items() if var.get() != "None"}
+        self.parent.student_team = dict(self.assignments)
         self.destroy()
         self.parent.create_quiz_app()
 
@@ -106,26 +224,188 @@ class QuizApp(tk.Tk):
         super().__init__()
         self.num_teams = 4  # Default number of teams
         self.student_team = {}
+        self.question_bank = QuestionBank(questions_file)
+        self.question_deck = QuestionDeck(self.question_bank.ids(), seed=quiz_seed)
+        self.engine = None
+        self.buzzer = None
+        self.buzzer_round = None  # Only buzzes from this round count
+        self.media = None
+        self.current_image = None  # Keeps the shown Tk image alive
+        self.current_audio = None
+        if profiler is not None:
+            # Nested inside the button handlers in the profile
+            for name in ("draw_question", "show_question", "update_leaderboard"):
+                setattr(self, name, profiler.wrap(name, getattr(self, name)))
+            profiler.on_over_budget = self.show_over_budget
+            profiler.start_lag_probe(self, LAG_PROBE_MS)
+        self.journal = self.open_journal()
+        state, events = self.journal.load() if self.journal is not None else (None, [])
+        self.resume_state = (state, events) if state is not None else None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.withdraw()  # Hide the main window initially
+        startup_timer.mark("data_load")
         self.team_input_dialog = TeamInputDialog(self)
+        self.team_input_dialog.bind("<Map>", self.on_first_paint)
         self.wait_window(self.team_input_dialog)  # Wait for the dialog to close
 
+    def on_first_paint(self, event):
+        if event.widget is not self.team_input_dialog:
+            return  # Children share the dialog's bindings
+        event.widget.unbind("<Map>")
+        self.update_idletasks()
+        startup_timer.mark("first_paint")
+        if startup_report:
+            startup_timer.write_report(startup_report)
+
+    def command(self, name, handler):
+        # Button handlers are timed when profiling is on
+        return profiler.wrap(name, handler) if profiler is not None else handler
+
     def show_student_assignment(self):
-        self.student_assignment_dialog = StudentAssignmentDialog(self)
+        if profiler is not None:
+            with profiler.span("StudentAssignmentDialog"):
+                self.student_assignment_dialog = StudentAssignmentDialog(self)
+        else:
+            self.student_assignment_dialog = StudentAssignmentDialog(self)
         self.wait_window(self.student_assignment_dialog)  # Wait for the dialog to close
 
-    def create_quiz_app(self):
+    def open_journal(self):
+        try:
+            return SessionJournal(session_dir)
+        except OSError:
+            return None  # Read-only install directory, run without a journal
+
+    def create_quiz_app(self, resume=None):
         self.title("Quiz App")
         self.geometry("1080x720")
-        self.team_names = [f"Team {i+1}" for i in range(self.num_teams)]
-        self.team_scores = {team: 0 for team in self.team_names}
-        self.current_question = None  # will hold a tuple (question, answer)
-        self.current_team_index = 0
-        self.skipped_teams = set()
+        if resume is not None:
+            # Latest snapshot plus the events journaled after it
+            state, events = resume
+            self.engine = QuizEngine.from_snapshot(
+                self.question_bank, state, seed=quiz_seed, deck=self.question_deck
+            )
+            for event in events:
+                self.engine.apply(event)
+            self.team_names = self.engine.team_names
+            self.num_teams = len(self.team_names)
+            self.student_team = dict(self.engine.roster.student_team)
+        else:
+            self.team_names = [f"Team {i+1}" for i in range(self.num_teams)]
+            self.question_deck.refill()  # A new quiz after a reset gets every question back
+            self.engine = QuizEngine(
+                self.question_bank, self.team_names, self.student_team, seed=quiz_seed, deck=self.question_deck
+            )
+        self.resume_state = None
+        self.engine.on_event = self.record_event
+        if self.journal is not None:
+            self.journal.start_session(self.engine.snapshot())
+        self.leaderboard = self.engine.leaderboard
+        self.leaderboard_page = 0
         self.answer_visible = False
+        # Drop the widgets of the quiz before a reset
+        for child in self.winfo_children():
+            if not isinstance(child, tk.Toplevel):
+                child.destroy()
         self.create_widgets()
+        if self.media is None:
+            self.start_media_loader()
+        self.show_current_team()
+        if self.current_question:
+            self.show_question(self.current_question)
+        if buzzer_port and self.buzzer is None:
+            self.start_buzzer()
+        self.sync_buzzer()
         self.deiconify()  # Show the main window
 
+    def record_event(self, event):
+        if self.journal is not None and self.journal.append(event):
+            self.journal.snapshot(self.engine.snapshot())
+        self.sync_buzzer(event["type"])
+
+    def start_media_loader(self):
+        # Imported here, the thread pool isn't needed for the first screen
+        from media import MediaLoader
+
+        self.media = MediaLoader(os.path.dirname(questions_file), MEDIA_CACHE_BYTES)
+        self.after(MEDIA_POLL_MS, self.poll_media)
+
+    def poll_media(self):
+        self.media.poll()
+        self.show_journal_error()  # Piggybacks on this poll, the journal has none of its own
+        self.after(MEDIA_POLL_MS, self.poll_media)
+
+    def show_journal_error(self):
+        # Write errors (e.g. a full disk) mean a crash would lose the quiz
+        error = self.journal.error if self.journal is not None else None
+        text = f"Session not saved: {error or type(error).__name__}" if error is not None else ""
+        if self.journal_label.winfo_exists() and self.journal_label.cget("text") != text:
+            self.journal_label.config(text=text)
+
+    def start_buzzer(self):
+        from buzzer import BuzzerServer
+
+        self.buzzer = BuzzerServer(port=int(buzzer_port))
+        try:
+            self.buzzer.start()
+        except OSError:
+            self.buzzer = None  # Port taken, carry on with turn-based play
+            return
+        self.after(BUZZER_POLL_MS, self.poll_buzzer)
+
+    def sync_buzzer(self, kind=None):
+        # Reopen the buzzers whenever the question or the skipped teams change
+        if self.buzzer is None:
+            return
+        if kind in (None, "draw", "skip", "reset"):
+            if self.current_question:
+                self.buzzer_round = self.buzzer.open_round(
+                    [team for team in self.team_names if team not in self.engine.skipped_teams]
+                )
+            else:
+                self.buzzer_round = self.buzzer.close_round()
+        self.buzzer.broadcast({
+            "current_team": self.engine.current_team,
+            "question_open": bool(self.current_question),
+            "scores": dict(self.leaderboard.scores),
+        })
+
+    def poll_buzzer(self):
+        # First valid buzz of a round makes that team the active one
+        while not self.buzzer.buzzes.empty():
+            round_id, team, elapsed = self.buzzer.buzzes.get()
+            if round_id != self.buzzer_round:
+                continue  # Buzzed for a question the host already moved past
+            if team in self.team_names and self.current_question:
+                self.team_var.set(team)
+                self.select_team()
+                self.random_student()
+        self.after(BUZZER_POLL_MS, self.poll_buzzer)
+
+    def show_over_budget(self, name, duration):
+        if getattr(self, "profile_label", None) is None or not self.profile_label.winfo_exists():
+            return
+        recent = [f"{name}: {seconds * 1000:.0f} ms" for _, name, seconds in list(profiler.over_budget)[-3:]]
+        self.profile_label.config(text="Over budget - " + ", ".join(reversed(recent)))
+
+    def export_profile(self):
+        # profile.json has every sample, profile.folded is for flame graph tools
+        try:
+            profiler.export_json(os.path.join(application_path, "profile.json"))
+            profiler.export_folded(os.path.join(application_path, "profile.folded"))
+        except OSError as e:
+            self.profile_label.config(text=f"Export failed: {e}")
+            return
+        self.profile_label.config(text=f"Profile saved to {application_path}")
+
+    def on_close(self):
+        if self.media is not None:
+            self.media.shutdown()
+        if self.buzzer is not None:
+            self.buzzer.stop()
+        if self.journal is not None:
+            self.journal.close()
+        self.destroy()
+
     def create_widgets(self):
         # --- TEAM SCORE SETTER SECTION ---
         self.score_setter_frame = ttk.LabelFrame(self, text="Set Team Score")
@@ -135,7 +415,8 @@ class QuizApp(tk.Tk):
         # Create radio buttons for each team
         for team in self.team_names:
             rb = ttk.Radiobutton(
-                self.score_setter_frame, text=team, variable=self.team_var, value=team
+                self.score_setter_frame, text=team, variable=self.team_var, value=team,
+                command=self.command("select_team", self.select_team),
             )
             rb.pack(side="left", padx=5)
 
@@ -144,13 +425,62 @@ class QuizApp(tk.Tk):
         self.score_entry = ttk.Entry(self.score_setter_frame, textvariable=self.score_var, width=5)
         self.score_entry.pack(side="left", padx=5)
 
-        self.set_score_button = ttk.Button(self.score_setter_frame, text="Set Score", command=self.set_team_score)
+        self.set_score_button = ttk.Button(
+            self.score_setter_frame, text="Set Score", command=self.command("set_team_score", self.set_team_score)
+        )
         self.set_score_button.pack(side="left", padx=5)
 
         # --- TEAM ASSIGNMENT SECTION ---
         self.team_frame = ttk.LabelFrame(self, text="Team Selection")
         self.team_frame.pack(side="top", fill="x", padx=10, pady=5)
 
+        # --- ROUND FILTER SECTION ---
+        self.filter_frame = ttk.LabelFrame(self, text="Round Filter")
+        self.filter_frame.pack(side="top", fill="x", padx=10, pady=5)
+
+        tag_index = self.engine.tag_index
+        ttk.Label(self.filter_frame, text="Category:").pack(side="left", padx=5)
+        self.category_var = tk.StringVar(value="Any")
+        self.category_combo = ttk.Combobox(
+            self.filter_frame, textvariable=self.category_var, state="readonly", width=15,
+            values=["Any"] + sorted(category for category in tag_index["category"] if category),
+        )
+        self.category_combo.pack(side="left", padx=5)
+
+        ttk.Label(self.filter_frame, text="Difficulty:").pack(side="left", padx=5)
+        self.difficulty_var = tk.StringVar(value="Any")
+        self.difficulty_combo = ttk.Combobox(
+            self.filter_frame, textvariable=self.difficulty_var, state="readonly", width=10,
+            values=["Any"] + sorted(tag_index["difficulty"]),
+        )
+        self.difficulty_combo.pack(side="left", padx=5)
+
+        ttk.Label(self.filter_frame, text="Tags:").pack(side="left", padx=5)
+        self.tags_var = tk.StringVar()
+        self.tags_entry = ttk.Entry(self.filter_frame, textvariable=self.tags_var, width=20)
+        self.tags_entry.pack(side="left", padx=5)
+
+        self.balance_var = tk.BooleanVar(value=False)
+        self.balance_check = ttk.Checkbutton(self.filter_frame, text="Balance categories", variable=self.balance_var)
+        self.balance_check.pack(side="left", padx=5)
+
+        self.apply_filter_button = ttk.Button(
+            self.filter_frame, text="Apply", command=self.command("apply_filter", self.apply_filter)
+        )
+        self.apply_filter_button.pack(side="left", padx=5)
+
+        self.clear_filter_button = ttk.Button(
+            self.filter_frame, text="Clear", command=self.command("clear_filter", self.clear_filter)
+        )
+        self.clear_filter_button.pack(side="left", padx=5)
+
+        # A resumed quiz may already have a filter, show it so Apply keeps it
+        if self.engine.question_filter:
+            self.category_var.set((self.engine.question_filter["categories"] or ["Any"])[0])
+            self.difficulty_var.set((self.engine.question_filter["difficulties"] or ["Any"])[0])
+            self.tags_var.set(", ".join(self.engine.question_filter["tags"]))
+            self.balance_var.set(self.engine.question_filter["balance"])
+
         # --- QUIZ CONTROL SECTION ---
         self.quiz_frame = ttk.LabelFrame(self, text="Quiz")
         self.quiz_frame.pack(side="top", fill="both", expand=True, padx=10, pady=5)
@@ -159,6 +489,10 @@ class QuizApp(tk.Tk):
         self.question_label = ttk.Label(self.quiz_frame, text="Press Start to get a question", wraplength=500, font=("Helvetica", 16))
         self.question_label.pack(pady=10)
 
+        # Image attached to the question, if any
+        self.media_label = ttk.Label(self.quiz_frame, text="")
+        self.media_label.pack(pady=5)
+
         # Display the randomly selected student for the current team
         self.student_label = ttk.Label(self.quiz_frame, text="Student: N/A")
         self.student_label.pack(pady=10)
@@ -171,77 +505,196 @@ class QuizApp(tk.Tk):
         self.control_frame = ttk.Frame(self.quiz_frame)
         self.control_frame.pack(pady=10)
 
-        self.start_button = ttk.Button(self.control_frame, text="Start Question", command=self.start_question)
+        self.start_button = ttk.Button(
+            self.control_frame, text="Start Question", command=self.command("start_question", self.start_question)
+        )
         self.start_button.pack(side="left", padx=5)
 
-        self.random_question_button = ttk.Button(self.control_frame, text="Random Question", command=self.random_question)
+        self.random_question_button = ttk.Button(
+            self.control_frame, text="Random Question", command=self.command("random_question", self.random_question)
+        )
         self.random_question_button.pack(side="left", padx=5)
 
-        self.random_student_button = ttk.Button(self.control_frame, text="Random Student", command=self.random_student)
+        self.random_student_button = ttk.Button(
+            self.control_frame, text="Random Student", command=self.command("random_student", self.random_student)
+        )
         self.random_student_button.pack(side="left", padx=5)
 
-        self.check_answer_button = ttk.Button(self.control_frame, text="Show Answer", command=self.toggle_answer)
+        self.check_answer_button = ttk.Button(
+            self.control_frame, text="Show Answer", command=self.command("toggle_answer", self.toggle_answer)
+        )
         self.check_answer_button.pack(side="left", padx=5)
 
-        self.correct_button = ttk.Button(self.control_frame, text="Correct", command=self.mark_correct)
+        self.correct_button = ttk.Button(
+            self.control_frame, text="Correct", command=self.command("mark_correct", self.mark_correct)
+        )
         self.correct_button.pack(side="left", padx=5)
 
-        self.skip_button = ttk.Button(self.control_frame, text="Skip", command=self.skip_question)
+        self.skip_button = ttk.Button(
+            self.control_frame, text="Skip", command=self.command("skip_question", self.skip_question)
+        )
         self.skip_button.pack(side="left", padx=5)
 
+        self.play_audio_button = ttk.Button(
+            self.control_frame, text="Play Audio", state="disabled", command=self.command("play_audio", self.play_audio)
+        )
+        self.play_audio_button.pack(side="left", padx=5)
+
         # --- LEADERBOARD SECTION ---
         self.score_frame = ttk.LabelFrame(self, text="Leaderboard")
         self.score_frame.pack(side="bottom", fill="x", padx=10, pady=5)
 
-        self.score_text = tk.Text(self.score_frame, height=5, state="disabled")
+        self.score_text = tk.Text(
+            self.score_frame, height=min(len(self.team_names), LEADERBOARD_PAGE_SIZE) + 1, state="disabled"
+        )
         self.score_text.pack(fill="x")
 
-        # Adding a reset button
+        # Paging for tournaments with more teams than fit on one page
+        self.page_frame = ttk.Frame(self.score_frame)
+        self.page_frame.pack()
+
+        self.prev_page_button = ttk.Button(
+            self.page_frame, text="< Prev", command=self.command("prev_page", lambda: self.show_leaderboard_page(-1))
+        )
+        self.prev_page_button.pack(side="left", padx=5)
+
+        self.page_label = ttk.Label(self.page_frame, text="")
+        self.page_label.pack(side="left", padx=5)
+
+        self.next_page_button = ttk.Button(
+            self.page_frame, text="Next >", command=self.command("next_page", lambda: self.show_leaderboard_page(1))
+        )
+        self.next_page_button.pack(side="left", padx=5)
+
+        # Adding a reset button. Not profiled: it waits in the dialogs, which
+        # would count the host's time there as a stalled handler.
         self.reset_button = ttk.Button(self.score_frame, text="Reset Quiz", command=self.reset_quiz)
         self.reset_button.pack(pady=10)
 
+        # Shown when the session journal can't be written
+        self.journal_label = ttk.Label(self.score_frame, text="", foreground="red")
+        self.journal_label.pack()
+
+        # --- PROFILING SECTION ---
+        if profiler is not None:
+            self.profile_frame = ttk.LabelFrame(self, text="Performance")
+            self.profile_frame.pack(side="bottom", fill="x", padx=10, pady=5)
+
+            self.profile_label = ttk.Label(self.profile_frame, text=f"No handler over {profiler.budget * 1000:.0f} ms yet")
+            self.profile_label.pack(side="left", padx=5)
+
+            self.export_profile_button = ttk.Button(self.profile_frame, text="Export Profile", command=self.export_profile)
+            self.export_profile_button.pack(side="right", padx=5)
+
+        self.update_leaderboard()
+
     def set_team_score(self):
         team = self.team_var.get()
         try:
             score = int(self.score_var.get())
-            self.team_scores[team] = score
-            self.update_leaderboard()
+            self.update_leaderboard(self.engine.set_score(team, score))
         except ValueError:
             pass  # Ignore invalid input
 
-    def start_question(self):
-        if not quiz_questions:
-            self.end_quiz()
-            return
-        # Randomly select a question (pop it so it isn’t repeated)
-        qid = random.choice(list(quiz_questions.keys()))
-        self.current_question = quiz_questions.pop(qid)
-        self.question_label.config(text=self.current_question["question"])
+    def draw_question(self):
+        # Shared by start_question and random_question; returns False once the deck is empty
+        question = self.engine.draw_question()
+        if question is None:
+            self.clear_media()
+            if self.engine.question_filter:
+                self.question_label.config(text="No questions left for this round's filter")
+            else:
+                self.end_quiz()
+            return False
+        self.show_question(question)
+        return True
+
+    def apply_filter(self):
+        # Any of the comma-separated tags matches
+        category, difficulty = self.category_var.get(), self.difficulty_var.get()
+        self.engine.set_filter(
+            categories=[category] if category != "Any" else [],
+            difficulties=[difficulty] if difficulty != "Any" else [],
+            tags=[tag for tag in self.tags_var.get().split(",") if tag.strip()],
+            balance=self.balance_var.get(),
+        )
+
+    def clear_filter(self):
+        self.category_var.set("Any")
+        self.difficulty_var.set("Any")
+        self.tags_var.set("")
+        self.balance_var.set(False)
+        self.engine.clear_filter()
+
+    def show_question(self, question):
+        self.question_label.config(text=question["question"], font=("Helvetica", 16))
         self.answer_label.config(text="")
         self.answer_visible = False
         self.check_answer_button.config(text="Show Answer")
-        self.random_student()
+        self.clear_media()
+        qid = self.engine.current_qid
+        if self.media.request(question, lambda field, media: self.show_media(qid, field, media)):
+            if self.current_image is None and self.current_audio is None:
+                self.media_label.config(text=MEDIA_LOADING)
+        # Warm the cache for what comes next while the host reads this one out
+        for upcoming in self.engine.upcoming(MEDIA_PREFETCH):
+            try:
+                self.media.prefetch(self.question_bank[upcoming])
+            except KeyError:
+                pass
+
+    def clear_media(self):
+        self.media_label.config(image="", text="")
+        self.play_audio_button.config(state="disabled")
+        self.current_image = None
+        self.current_audio = None
+
+    def show_media(self, qid, field, media):
+        if qid != self.engine.current_qid:
+            return  # Arrived after the host moved on
+        # Only the placeholder is replaced, an error for the question's other
+        # media file stays visible (under the image, if there is one)
+        text = self.media_label.cget("text")
+        if text == MEDIA_LOADING:
+            text = ""
+        if media.error:
+            text = " ".join(filter(None, [text, f"[{field} unavailable: {media.error}]"]))
+        elif field == "image":
+            self.current_image = media.value
+            self.media_label.config(image=self.current_image, compound="top")
+        else:
+            self.current_audio = media.value
+            self.play_audio_button.config(state="normal")
+        self.media_label.config(text=text)
+
+    def play_audio(self):
+        from media import play_audio
+
+        if self.current_audio is not None and not play_audio(self.current_audio):
+            self.media_label.config(text="[Audio playback needs Windows]")
+
+    def start_question(self):
+        if self.draw_question():
+            self.random_student()
 
     def random_question(self):
-        if not quiz_questions:
-            self.end_quiz()
-            return
-        qid = random.choice(list(quiz_questions.keys()))
-        self.current_question = quiz_questions.pop(qid)
-        self.question_label.config(text=self.current_question["question"], font=("Helvetica", 16))
-        self.answer_label.config(text="")
-        self.answer_visible = False
-        self.check_answer_button.config(text="Show Answer")
+        self.draw_question()
 
     def random_student(self):
-        current_team = self.team_var.get()
-        assigned_students = [student for student, team in self.student_team.items() if team == current_team]
-        if assigned_students:
-            selected_student = random.choice(assigned_students)
+        # Rotates through the team, least recently called student first
+        selected_student = self.engine.pick_student()
+        if selected_student is not None:
             self.student_label.config(text=f"Student: {students[selected_student]}", font=("Helvetica", 16))
         else:
             self.student_label.config(text="Student: N/A", font=("Helvetica", 16))
 
+    @property
+    def current_question(self):
+        return self.engine.current_question
+
+    def select_team(self):
+        self.engine.select_team(self.team_var.get())
+
     def toggle_answer(self):
         if self.current_question:
             if self.answer_visible:
@@ -253,49 +706,76 @@ class QuizApp(tk.Tk):
             self.answer_visible = not self.answer_visible
 
     def mark_correct(self):
-        team = self.team_var.get()
-        self.team_scores[team] += 1
-        self.update_leaderboard()
+        self.update_leaderboard(self.engine.mark_correct())
         self.next_team()
         self.start_question()
 
     def skip_question(self):
-        current_team = self.team_var.get()
-        self.skipped_teams.add(current_team)
-        self.next_team()
-        if len(self.skipped_teams) == len(self.team_names):
-            self.skipped_teams.clear()
+        needs_question = self.engine.skip()
+        self.show_current_team()
+        if needs_question:
             self.question_label.config(text="Question Skipped!")
-            self.current_question = None
             self.start_question()
 
     def next_team(self):
-        self.current_team_index = (self.current_team_index + 1) % len(self.team_names)
-        self.team_var.set(self.team_names[self.current_team_index])
-        self.student_label.config(text="Student: N/A")
-        if self.current_team_index == 0 and self.current_question is None:
+        needs_question = self.engine.next_team()
+        self.show_current_team()
+        if needs_question:
             self.start_question()
 
-    def update_leaderboard(self):
-        leaderboard = "Leaderboard:\n"
-        for team, score in self.team_scores.items():
-            leaderboard += f"{team}: {score}\n"
+    def show_current_team(self):
+        self.team_var.set(self.engine.current_team)
+        self.student_label.config(text="Student: N/A")
+
+    def update_leaderboard(self, changed=None):
+        # changed is the (first, last) row range returned by Leaderboard.set_score;
+        # only those rows are rewritten. None redraws the whole page.
+        if changed is None and self.leaderboard_page >= self.leaderboard.page_count(LEADERBOARD_PAGE_SIZE):
+            self.leaderboard_page = 0
+        start = self.leaderboard_page * LEADERBOARD_PAGE_SIZE
+        stop = min(start + LEADERBOARD_PAGE_SIZE, len(self.leaderboard))
+        if changed is None:
+            leaderboard = "Leaderboard:\n"
+            for rank, team, score in self.leaderboard.page(self.leaderboard_page, LEADERBOARD_PAGE_SIZE):
+                leaderboard += f"{rank}. {team}: {score}\n"
+            self.score_text.config(state="normal")
+            self.score_text.delete("1.0", tk.END)
+            self.score_text.insert(tk.END, leaderboard)
+            self.score_text.config(state="disabled")
+            self.page_label.config(
+                text=f"Page {self.leaderboard_page + 1}/{self.leaderboard.page_count(LEADERBOARD_PAGE_SIZE)}"
+            )
+            return
+        first, last = max(changed[0], start), min(changed[1], stop - 1)
+        if first > last:
+            return  # Nothing moved on the visible page
         self.score_text.config(state="normal")
-        self.score_text.delete("1.0", tk.END)
-        self.score_text.insert(tk.END, leaderboard)
+        for row in range(first, last + 1):
+            line = row - start + 2  # Line 1 is the header
+            rank, team, score = self.leaderboard.row(row)
+            self.score_text.delete(f"{line}.0", f"{line}.end")
+            self.score_text.insert(f"{line}.0", f"{rank}. {team}: {score}")
         self.score_text.config(state="disabled")
 
+    def show_leaderboard_page(self, step):
+        pages = self.leaderboard.page_count(LEADERBOARD_PAGE_SIZE)
+        self.leaderboard_page = min(max(self.leaderboard_page + step, 0), pages - 1)
+        self.update_leaderboard()
+
     def end_quiz(self):
         self.update_leaderboard()
         self.question_label.config(text="Quiz Finished!")
 
     def reset_quiz(self):
+        # Nothing is journaled here: the session on disk stays the pre-reset quiz
+        # until create_quiz_app starts a new one, so it survives a crash in the
+        # dialogs and can be resumed from the team dialog
+        self.resume_state = (self.engine.snapshot(), [])
+        if self.buzzer is not None:
+            # A buzz during the dialogs would be journaled into the old quiz
+            self.buzzer_round = self.buzzer.close_round()
         self.num_teams = 4
         self.student_team = {}
-        self.team_scores = {team: 0 for team in self.team_names}
-        self.current_question = None
-        self.current_team_index = 0
-        self.skipped_teams = set()
         self.withdraw()
         self.team_input_dialog = TeamInputDialog(self)
         self.wait_window(self.team_input_dialog)
@@ -0,0 +1,225 @@
+import base64
+import os
+import queue
+import struct
+import sys
+import wave
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Question fields that reference media files, relative to the question bank
+MEDIA_FIELDS = ("image", "audio")
+IMAGE_EXTENSIONS = {".png", ".gif", ".jpg", ".jpeg", ".bmp", ".webp"}
+AUDIO_EXTENSIONS = {".wav"}
+MAX_FILE_BYTES = 32 * 1024 * 1024
+MAX_IMAGE_SIZE = (640, 360)
+
+
+class MediaError(Exception):
+    pass
+
+
+class MediaCache:
+    # LRU cache bounded by the approximate decoded size of its entries
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()  # key -> (value, size)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        item = self._items.get(key)
+        if item is None:
+            return default
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key, value, size):
+        if key in self._items:
+            self.size -= self._items.pop(key)[1]
+        self._items[key] = (value, size)
+        self.size += size
+        # Always keep the newest entry, even if it is bigger than the budget
+        while self.size > self.max_bytes and len(self._items) > 1:
+            _, (_, old_size) = self._items.popitem(last=False)
+            self.size -= old_size
+
+
+class Media:
+    # A decoded image or sound. For images, value is a Tk image once the
+    # loader has finished it on the Tk thread; for audio it is the WAV bytes.
+    def __init__(self, kind, value, size, error=None):
+        self.kind = kind
+        self.value = value
+        self.size = size
+        self.error = error
+
+
+def media_refs(question):
+    # (field, path) pairs for the media a question references
+    return [(field, question[field]) for field in MEDIA_FIELDS if question.get(field)]
+
+
+def resolve_path(base_dir, ref):
+    # Media must live under the question bank's directory
+    base_dir = os.path.abspath(base_dir)
+    path = os.path.abspath(os.path.join(base_dir, ref))
+    if os.path.commonpath([base_dir, path]) != base_dir:
+        raise MediaError(f"{ref} is outside the question folder")
+    return path
+
+
+def decode(kind, path):
+    # Runs on a worker thread: validate the file and do the expensive decoding.
+    # Returns (payload, size in bytes) for finish() on the Tk thread.
+    ext = os.path.splitext(path)[1].lower()
+    allowed = IMAGE_EXTENSIONS if kind == "image" else AUDIO_EXTENSIONS
+    if ext not in allowed:
+        raise MediaError(f"unsupported {kind} type {ext or '(none)'}")
+    try:
+        if os.path.getsize(path) > MAX_FILE_BYTES:
+            raise MediaError(f"{os.path.basename(path)} is larger than {MAX_FILE_BYTES // (1024 * 1024)} MB")
+        if kind == "audio":
+            with wave.open(path, "rb") as w:
+                w.getparams()  # Raises on anything that isn't a valid WAV
+            with open(path, "rb") as f:
+                data = f.read()
+            return data, len(data)
+        try:
+            from PIL import Image
+        except ImportError:
+            # Without Pillow, Tk decodes PNG and GIF itself when finishing and
+            # can't scale them down first, so oversized ones are refused here
+            # rather than decoded at full size on the Tk thread
+            if ext not in (".png", ".gif"):
+                raise MediaError(f"{ext} images need Pillow installed")
+            with open(path, "rb") as f:
+                data = f.read()
+            width, height = image_size(data)
+            if width > MAX_IMAGE_SIZE[0] or height > MAX_IMAGE_SIZE[1]:
+                raise MediaError(
+                    f"{os.path.basename(path)} is {width}x{height}, larger than "
+                    f"{MAX_IMAGE_SIZE[0]}x{MAX_IMAGE_SIZE[1]} (install Pillow to scale it)"
+                )
+            return ("tk", base64.b64encode(data)), width * height * 4
+        with Image.open(path) as image:
+            image.thumbnail(MAX_IMAGE_SIZE)
+            image = image.convert("RGBA")
+        return ("pil", image), image.width * image.height * 4
+    except (OSError, EOFError, wave.Error) as e:
+        raise MediaError(f"cannot read {os.path.basename(path)}: {e or type(e).__name__}") from e
+    except ValueError as e:  # Pillow's DecompressionBombError and friends
+        raise MediaError(f"cannot decode {os.path.basename(path)}: {e}") from e
+
+
+def image_size(data):
+    # (width, height) from a PNG or GIF header, without decoding the pixels
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and data[12:16] == b"IHDR":
+        return struct.unpack(">II", data[16:24])
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        return struct.unpack("<HH", data[6:10])
+    raise ValueError("not a valid PNG or GIF image")
+
+
+def finish(kind, payload):
+    # Runs on the Tk thread, which is the only one allowed to create images
+    if kind == "audio":
+        return payload
+    source, data = payload
+    if source == "pil":
+        from PIL import ImageTk
+
+        return ImageTk.PhotoImage(data)
+    import tkinter as tk
+
+    return tk.PhotoImage(data=data)
+
+
+class MediaLoader:
+    # Decodes question media on a thread pool. Finished work is queued and
+    # picked up by poll(), which the Tk side calls from after(); callbacks
+    # passed to request() run there, on the Tk thread.
+    def __init__(self, base_dir, cache_bytes=64 * 1024 * 1024, workers=2):
+        self.base_dir = base_dir
+        self.cache = MediaCache(cache_bytes)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="media")
+        self._done = queue.Queue()
+        self._pending = {}  # key -> callbacks waiting for it
+
+    def request(self, question, callback=None):
+        # Calls callback(field, media) for each media file of the question, right
+        # away when cached, otherwise from poll() once it has been decoded.
+        # Returns the question's (field, path) media references.
+        refs = media_refs(question)
+        for field, ref in refs:
+            key = (field, ref)
+            media = self.cache.get(key)
+            if media is not None:
+                if callback is not None:
+                    callback(field, media)
+                continue
+            callbacks = self._pending.get(key)
+            if callbacks is None:
+                callbacks = self._pending[key] = []
+                self._executor.submit(self._load, key)
+            if callback is not None:
+                callbacks.append(callback)
+        return refs
+
+    def prefetch(self, question):
+        self.request(question)
+
+    def _load(self, key):
+        field, ref = key
+        try:
+            result = decode(field, resolve_path(self.base_dir, ref))
+        except MediaError as e:
+            result = e
+        except Exception as e:  # Never let a bad file kill the worker silently
+            result = MediaError(f"cannot load {ref}: {e}")
+        self._done.put((key, result))
+
+    def poll(self):
+        while True:
+            try:
+                key, result = self._done.get_nowait()
+            except queue.Empty:
+                return
+            field = key[0]
+            if isinstance(result, MediaError):
+                # Not cached, so fixing the file and asking again works
+                media = Media(field, None, 0, error=str(result))
+            else:
+                payload, size = result
+                try:
+                    value = finish(field, payload)
+                    if field == "image":
+                        size = value.width() * value.height() * 4  # What Tk actually holds
+                    media = Media(field, value, size)
+                    self.cache.put(key, media, size)
+                except Exception as e:  # Tk rejects some files that looked valid
+                    media = Media(field, None, 0, error=f"cannot decode {key[1]}: {e}")
+            for callback in self._pending.pop(key, ()):
+                callback(field, media)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def play_audio(data):
+    # Only Windows has playback in the standard library (winsound). It can't
+    # play from memory asynchronously, so the sound plays on its own thread.
+    if sys.platform != "win32":
+        return False
+    import threading
+    import winsound
+
+    threading.Thread(
+        target=winsound.PlaySound, args=(data, winsound.SND_MEMORY | winsound.SND_NODEFAULT), daemon=True
+    ).start()
+    return True
@@ -0,0 +1,109 @@
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0
+    i = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+class Profiler:
+    # Opt-in timing for the Tk UI. wrap() and span() time handlers into one
+    # fixed-size ring buffer per call path, and start_lag_probe() measures how
+    # late after() callbacks run, which is how long the event loop was blocked.
+    # Anything over budget_ms is passed to on_over_budget as it happens.
+    def __init__(self, budget_ms=50, capacity=2048):
+        self.budget = budget_ms / 1000
+        self.capacity = capacity
+        self.samples = {}  # "outer;inner" call path -> deque of (start, seconds)
+        self.self_time = {}  # call path -> total seconds not spent in nested calls
+        self.lag = deque(maxlen=capacity)
+        self.over_budget = deque(maxlen=100)
+        self.on_over_budget = None
+        self._stack = []
+        self._clock = time.perf_counter
+
+    def wrap(self, name, fn):
+        def timed(*args, **kwargs):
+            with self.span(name):
+                return fn(*args, **kwargs)
+        return timed
+
+    @contextmanager
+    def span(self, name):
+        # Each frame is [name, seconds spent in nested spans]
+        frame = [name, 0.0]
+        self._stack.append(frame)
+        start = self._clock()
+        try:
+            yield
+        finally:
+            duration = self._clock() - start
+            path = ";".join(f[0] for f in self._stack)
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][1] += duration
+            self._record(path, start, duration, duration - frame[1])
+
+    def _record(self, path, start, duration, self_time):
+        buffer = self.samples.get(path)
+        if buffer is None:
+            buffer = self.samples[path] = deque(maxlen=self.capacity)
+        buffer.append((start, duration))
+        self.self_time[path] = self.self_time.get(path, 0.0) + self_time
+        if duration > self.budget:
+            self._over_budget(path, duration)
+
+    def _over_budget(self, name, duration):
+        self.over_budget.append((time.time(), name, duration))
+        if self.on_over_budget is not None:
+            self.on_over_budget(name, duration)
+
+    def start_lag_probe(self, widget, interval_ms=100):
+        interval = interval_ms / 1000
+        expected = [self._clock() + interval]
+
+        def probe():
+            now = self._clock()
+            lag = max(0.0, now - expected[0])
+            self.lag.append((now, lag))
+            if lag > self.budget:
+                self._over_budget("event loop lag", lag)
+            expected[0] = now + interval
+            widget.after(interval_ms, probe)
+
+        widget.after(interval_ms, probe)
+
+    def summary(self):
+        # Latency percentiles in ms for every call path and the event loop lag
+        result = {}
+        for path, buffer in list(self.samples.items()) + [("event loop lag", self.lag)]:
+            durations = sorted(duration for _, duration in buffer)
+            result[path] = {
+                "count": len(durations),
+                "p50_ms": percentile(durations, 50) * 1000,
+                "p99_ms": percentile(durations, 99) * 1000,
+                "max_ms": (durations[-1] if durations else 0) * 1000,
+            }
+        return result
+
+    def export_json(self, path):
+        data = {
+            "budget_ms": self.budget * 1000,
+            "summary": self.summary(),
+            "samples": {name: list(buffer) for name, buffer in self.samples.items()},
+            "lag": list(self.lag),
+            "over_budget": list(self.over_budget),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    def export_folded(self, path):
+        # Collapsed stacks ("outer;inner microseconds") for flamegraph.pl or speedscope
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, seconds in sorted(self.self_time.items()):
+                f.write(f"{stack} {max(0, round(seconds * 1_000_000))}\n")
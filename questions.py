@@ -0,0 +1,267 @@
+import json
+import os
+import random
+
+from datacache import file_sha256, load_cached
+
+
+class QuestionDeck:
+    # Draws question ids without repeats in O(1) using swap-remove.
+    # Ids in self._ids[:self._remaining] are still in the deck, the rest
+    # have been drawn, so refilling is just resetting the counter. The last
+    # self._ahead remaining ids are already chosen by peek(), next draw last.
+    def __init__(self, question_ids, seed=None):
+        self._order = list(question_ids)
+        self._ids = list(self._order)
+        self._pos = {qid: i for i, qid in enumerate(self._ids)}
+        self._remaining = len(self._ids)
+        self._ahead = 0
+        self._rng = random.Random(seed)
+
+    def __len__(self):
+        return self._remaining
+
+    def __bool__(self):
+        return self._remaining > 0
+
+    def __contains__(self, qid):
+        i = self._pos.get(qid)
+        return i is not None and i < self._remaining
+
+    def _swap(self, i, j):
+        ids = self._ids
+        ids[i], ids[j] = ids[j], ids[i]
+        self._pos[ids[i]] = i
+        self._pos[ids[j]] = j
+
+    def _take(self, i):
+        # Swap slot i to the end of the remaining ids and shrink the deck over it
+        last = self._remaining - 1
+        self._swap(i, last)
+        self._remaining = last
+        return self._ids[last]
+
+    def draw(self):
+        if not self._remaining:
+            raise IndexError("draw from an empty question deck")
+        if self._ahead:
+            self._ahead -= 1
+            return self._take(self._remaining - 1)
+        return self._take(self._rng.randrange(self._remaining))
+
+    def peek(self, n):
+        # The ids the next n draws will return, e.g. to prefetch their media.
+        # Picks them the same way draw() would, so a seeded order is unchanged.
+        n = min(n, self._remaining)
+        while self._ahead < n:
+            last = self._remaining - 1 - self._ahead
+            self._swap(self._rng.randrange(last + 1), last)
+            self._ahead += 1
+        return [self._ids[self._remaining - 1 - k] for k in range(n)]
+
+    def remove(self, qid):
+        # Takes a specific question out of the deck, e.g. when replaying a
+        # journal. Returns False if it was already drawn or is unknown.
+        i = self._pos.get(qid)
+        if i is None or i >= self._remaining:
+            return False
+        self._ahead = 0  # The swap below can move a peeked id, so choose again
+        self._take(i)
+        return True
+
+    def drawn(self):
+        return self._ids[self._remaining:]
+
+    def reshuffle(self, seed=None):
+        # Only the rng needs resetting, draws are already random
+        self._rng.seed(seed)
+        self._ahead = 0
+
+    def refill(self, seed=None):
+        # Put every drawn question back. Passing a seed also restores the
+        # original id order so the same draw sequence can be replayed.
+        if seed is not None:
+            self._ids = list(self._order)
+            self._pos = {qid: i for i, qid in enumerate(self._ids)}
+            self._rng.seed(seed)
+        self._remaining = len(self._ids)
+        self._ahead = 0
+
+
+class FilteredDeck:
+    # Draws from a subset of the main deck, e.g. one round's topic. Each draw
+    # also takes the question out of the main deck, so nothing repeats across
+    # filters; ids drawn elsewhere since the filter was built are skipped.
+    def __init__(self, main_deck, question_ids, seed=None):
+        self.main_deck = main_deck
+        self._deck = QuestionDeck([qid for qid in question_ids if qid in main_deck], seed=seed)
+
+    def draw(self):
+        while self._deck:
+            qid = self._deck.draw()
+            if self.main_deck.remove(qid):
+                return qid
+        raise IndexError("draw from an exhausted filter")
+
+    def peek(self, n):
+        return [qid for qid in self._deck.peek(n) if qid in self.main_deck]
+
+
+class BalancedDeck:
+    # Rotates through categories so each gets an even share of the draws
+    def __init__(self, main_deck, ids_by_category, seed=None):
+        self._decks = [FilteredDeck(main_deck, ids, seed=seed) for ids in ids_by_category.values() if ids]
+        self._next = 0
+
+    def draw(self):
+        while self._decks:
+            i = self._next % len(self._decks)
+            try:
+                qid = self._decks[i].draw()
+            except IndexError:
+                del self._decks[i]  # Category used up, keep rotating through the rest
+                self._next = i
+                continue
+            self._next = i + 1
+            return qid
+        raise IndexError("draw from an exhausted filter")
+
+    def peek(self, n):
+        # Next id of each category in rotation order, enough for a prefetch
+        ids = []
+        for k in range(len(self._decks)):
+            if len(ids) >= n:
+                break
+            ids.extend(self._decks[(self._next + k) % len(self._decks)].peek(1))
+        return ids[:n]
+
+
+class QuestionBank:
+    # Keeps only question ids in memory. The question and answer text lives in
+    # an SQLite index next to the JSON file and is fetched one row at a time.
+    # The index is built once and reused until the source file changes, and
+    # the id list is cached separately so startup doesn't even open the index.
+    INDEX_VERSION = "1"
+
+    def __init__(self, source_path, index_path=None):
+        self.source_path = source_path
+        if index_path is None:
+            index_path = os.path.splitext(source_path)[0] + ".idx.sqlite"
+        self.index_path = index_path
+        self._db = None
+
+    @property
+    def _conn(self):
+        # Opened on first use, sqlite3 isn't needed to show the first screen
+        if self._db is None:
+            import sqlite3
+
+            try:
+                self._db = self._open_index(self.index_path)
+            except sqlite3.Error:
+                # Read-only install directory: keep the index in memory instead
+                self._db = self._open_index(":memory:")
+        return self._db
+
+    def _open_index(self, index_path):
+        import sqlite3
+
+        conn = sqlite3.connect(index_path)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS questions "
+            "(pos INTEGER PRIMARY KEY, qid TEXT UNIQUE NOT NULL, data TEXT NOT NULL)"
+        )
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        st = os.stat(self.source_path)
+        stamp = {"version": self.INDEX_VERSION, "mtime_ns": str(st.st_mtime_ns), "size": str(st.st_size)}
+        if meta.get("version") == self.INDEX_VERSION:
+            if all(meta.get(key) == value for key, value in stamp.items()):
+                return conn
+            # Touched but maybe not edited: compare content before rebuilding
+            if meta.get("sha256") == file_sha256(self.source_path):
+                self._write_meta(conn, stamp)
+                return conn
+        self._rebuild(conn, stamp)
+        return conn
+
+    def _rebuild(self, conn, stamp):
+        import hashlib
+
+        with open(self.source_path, "rb") as f:
+            raw = f.read()
+        questions = json.loads(raw.decode("utf-8"))
+        stamp = dict(stamp, sha256=hashlib.sha256(raw).hexdigest())
+        with conn:
+            conn.execute("DELETE FROM questions")
+            conn.executemany(
+                "INSERT INTO questions (qid, data) VALUES (?, ?)",
+                ((qid, json.dumps(entry, ensure_ascii=False)) for qid, entry in questions.items()),
+            )
+            self._write_meta(conn, stamp)
+
+    def _write_meta(self, conn, stamp):
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", stamp.items())
+
+    def ids(self):
+        return load_cached(self.source_path, self._load_ids)
+
+    def _load_ids(self):
+        return [row[0] for row in self._conn.execute("SELECT qid FROM questions ORDER BY pos")]
+
+    def tag_index(self):
+        # See build_tag_index; cached on disk alongside the id list
+        return load_cached(
+            self.source_path, self._load_tag_index, cache_path=os.path.splitext(self.source_path)[0] + ".tags.cache"
+        )
+
+    def _load_tag_index(self):
+        rows = self._conn.execute("SELECT qid, data FROM questions ORDER BY pos")
+        return build_tag_index((qid, json.loads(data)) for qid, data in rows)
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def __getitem__(self, qid):
+        row = self._conn.execute("SELECT data FROM questions WHERE qid = ?", (qid,)).fetchone()
+        if row is None:
+            raise KeyError(qid)
+        return json.loads(row[0])
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class MemoryQuestionBank(dict):
+    # Same interface as QuestionBank for questions that are already in memory
+    def ids(self):
+        return list(self)
+
+    def tag_index(self):
+        return build_tag_index(self.items())
+
+
+def normalize_tag(value):
+    return str(value).strip().lower()
+
+
+def build_tag_index(entries):
+    # Inverted index from the optional "category", "difficulty" and "tags"
+    # fields of each question to question ids, in bank order. Values are
+    # normalised with normalize_tag; uncategorised questions are under "".
+    index = {"category": {}, "difficulty": {}, "tag": {}}
+    for qid, entry in entries:
+        index["category"].setdefault(normalize_tag(entry.get("category", "")), []).append(qid)
+        if entry.get("difficulty") is not None:
+            index["difficulty"].setdefault(normalize_tag(entry["difficulty"]), []).append(qid)
+        tags = entry.get("tags") or ()
+        if isinstance(tags, str):
+            tags = tags.split(",")
+        for tag in {normalize_tag(tag) for tag in tags}:
+            if tag:
+                index["tag"].setdefault(tag, []).append(qid)
+    return index
+
@@ -0,0 +1,70 @@
+import random
+from collections import OrderedDict
+
+
+class Roster:
+    # Maps each team to its members. Every team keeps its members in an
+    # OrderedDict ordered from least to most recently called, so picking the
+    # next student and moving them to the back are both O(1).
+    def __init__(self, student_team=None, seed=None):
+        self._rng = random.Random(seed)
+        self.student_team = {}
+        self.members = {}
+        self.call_counts = {}
+        if student_team:
+            # Shuffle once so the first pass through a team isn't in file order
+            items = list(student_team.items())
+            self._rng.shuffle(items)
+            for student, team in items:
+                self.assign(student, team)
+
+    def assign(self, student, team):
+        old_team = self.student_team.get(student)
+        if old_team == team:
+            return
+        if old_team is not None:
+            del self.members[old_team][student]
+        if team is None or team == "None":
+            self.student_team.pop(student, None)
+            return
+        self.student_team[student] = team
+        queue = self.members.setdefault(team, OrderedDict())
+        queue[student] = None
+        # Newly assigned students go to the front so they get called soon
+        queue.move_to_end(student, last=False)
+
+    @classmethod
+    def from_state(cls, members, call_counts=None, seed=None):
+        # Rebuilds a roster saved with state(), keeping each team's call order
+        roster = cls(seed=seed)
+        for team, students in members.items():
+            roster.members[team] = OrderedDict.fromkeys(students)
+            for student in students:
+                roster.student_team[student] = team
+        roster.call_counts = dict(call_counts or {})
+        return roster
+
+    def state(self):
+        return {team: list(queue) for team, queue in self.members.items()}
+
+    def unassign(self, student):
+        self.assign(student, None)
+
+    def team_members(self, team):
+        return list(self.members.get(team, ()))
+
+    def next_student(self, team):
+        # Least recently called student of the team, or None if it is empty
+        queue = self.members.get(team)
+        if not queue:
+            return None
+        student = next(iter(queue))
+        self.mark_called(student)
+        return student
+
+    def mark_called(self, student):
+        team = self.student_team.get(student)
+        if team is None:
+            return
+        self.members[team].move_to_end(student)
+        self.call_counts[student] = self.call_counts.get(student, 0) + 1
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+
+
+class StartupTimer:
+    # Times the phases of a cold start. Create it before the other imports in
+    # main.py and call mark() as each phase finishes; the bootloader phase is
+    # measured back to when the OS created the process.
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_wall = time.time()
+        self.marks = []
+
+    def mark(self, phase):
+        self.marks.append((phase, time.perf_counter()))
+
+    def report(self):
+        result = {"frozen": bool(getattr(sys, "frozen", False)), "onefile": is_onefile()}
+        process_start = process_start_time(parent=result["onefile"])
+        if process_start is not None:
+            result["bootloader_ms"] = round((self.started_wall - process_start) * 1000, 1)
+        previous = self.started
+        for phase, at in self.marks:
+            result[f"{phase}_ms"] = round((at - previous) * 1000, 1)
+            previous = at
+        result["total_ms"] = round((previous - self.started) * 1000 + result.get("bootloader_ms", 0), 1)
+        return result
+
+    def write_report(self, path):
+        import json
+
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.report(), f, indent=2)
+        except OSError:
+            pass
+
+
+def is_onefile():
+    # A one-file build unpacks into a temporary _MEIxxxxx directory
+    meipass = getattr(sys, "_MEIPASS", None)
+    return meipass is not None and os.path.basename(meipass).startswith("_MEI")
+
+
+def process_start_time(parent=False):
+    # Creation time of this process as a time.time() value, or of the parent
+    # for one-file builds where the bootloader runs in a separate process.
+    # Returns None where the platform doesn't expose it.
+    pid = os.getppid() if parent else os.getpid()
+    try:
+        if sys.platform == "win32":
+            return _windows_start_time(pid)
+        if sys.platform.startswith("linux"):
+            return _linux_start_time(pid)
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _windows_start_time(pid):
+    import ctypes
+    from ctypes import wintypes
+
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None
+    try:
+        times = [wintypes.FILETIME() for _ in range(4)]
+        if not kernel32.GetProcessTimes(handle, *[ctypes.byref(t) for t in times]):
+            return None
+        created = times[0].dwHighDateTime << 32 | times[0].dwLowDateTime
+        # FILETIME counts 100 ns intervals since 1601-01-01
+        return created / 10_000_000 - 11_644_473_600
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _linux_start_time(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        # Field 22, counted after the parenthesised command name
+        fields = f.read().rsplit(")", 1)[1].split()
+    ticks = int(fields[19])
+    with open("/proc/stat") as f:
+        boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+    return boot_time + ticks / os.sysconf("SC_CLK_TCK")